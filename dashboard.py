@@ -1,53 +1,187 @@
-import json
+import base64
+import binascii
+import configparser
 import logging
 import os
+import queue
 import sqlite3
-from flask import Flask, jsonify, render_template, request
+import threading
+
+import orjson
+from cachetools import TTLCache
+from flask import Flask, g, render_template, request
+from flask.json.provider import JSONProvider
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson instead of the stdlib json module."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=str, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - [Dashboard] %(message)s')
 
-def get_db_path():
-    # Simplified for brevity
-    return 'scraper_data.db'
+def json_response(obj):
+    # Hand orjson's bytes straight to the response, skipping the str round-trip of jsonify.
+    return app.response_class(orjson.dumps(obj, default=str, option=ORJSON_OPTIONS), mimetype='application/json')
+
+STATUS_FILE = 'status.json'
+# Dashboard polls re-request slowly-changing data; serve repeats from memory for a couple of seconds.
+_response_cache = TTLCache(maxsize=64, ttl=2.0)
+_response_cache_lock = threading.Lock()
+
+def cached_json_response(key, load):
+    """Returns the cached JSON body for key, calling load() to rebuild it on a miss."""
+    with _response_cache_lock:
+        body = _response_cache.get(key)
+    if body is None:
+        body = orjson.dumps(load(), default=str, option=ORJSON_OPTIONS)
+        with _response_cache_lock:
+            _response_cache[key] = body
+    return app.response_class(body, mimetype='application/json')
+
+CONFIG_FILE = 'config.ini'
+
+def _load_db_path():
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE)
+    return config.get('main', 'database_file', fallback='scraper_data.db')
+
+# Resolved once at startup; the database location doesn't change while the dashboard runs.
+DB_PATH = _load_db_path()
+
+DB_POOL_SIZE = 8
+DB_PRAGMAS = """
+PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA cache_size=-65536;
+PRAGMA mmap_size=268435456; PRAGMA temp_store=MEMORY; PRAGMA query_only=1;
+"""
+_pool = queue.Queue(maxsize=DB_POOL_SIZE)
+
+def _open_connection():
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(DB_PRAGMAS)
+    return conn
+
+def init_pool():
+    """Fills the pool with reusable connections so requests don't reopen the database."""
+    for _ in range(DB_POOL_SIZE):
+        _pool.put(_open_connection())
+
+def get_request_conn():
+    """Checks out one pooled connection per request; it is returned in release_conn."""
+    if 'db' not in g:
+        g.db = _pool.get()
+    return g.db
+
+@app.teardown_appcontext
+def release_conn(exception):
+    conn = g.pop('db', None)
+    if conn is not None:
+        _pool.put(conn)
+
+init_pool()
 
 @app.route('/')
 def index(): return render_template('index.html')
 
 def query_db(query, params=()):
-    with sqlite3.connect(get_db_path()) as conn:
-        conn.row_factory = sqlite3.Row
-        return [dict(row) for row in conn.execute(query, params).fetchall()]
+    return [dict(row) for row in get_request_conn().execute(query, params)]
+
+STREAM_CHUNK_SIZE = 1000
+
+def stream_query(query, params=()):
+    """Streams a query's rows as a JSON array, encoding one chunk at a time instead of building the full list."""
+    # The body is iterated after teardown has returned the request's connection, so the stream
+    # checks out its own and holds it until the last chunk is sent.
+    def generate():
+        conn, cursor = _pool.get(), None
+        try:
+            cursor = conn.execute(query, params)
+            keys = [column[0] for column in cursor.description]
+            yield b'['
+            separator = b''
+            while chunk := cursor.fetchmany(STREAM_CHUNK_SIZE):
+                yield separator + b','.join(orjson.dumps(dict(zip(keys, row)), default=str, option=ORJSON_OPTIONS) for row in chunk)
+                separator = b','
+            yield b']'
+        finally:
+            # Finalise the statement even if the client disconnected mid-stream, so it holds no read snapshot.
+            if cursor is not None:
+                cursor.close()
+            _pool.put(conn)
+    return app.response_class(generate(), mimetype='application/json')
 
 @app.route('/api/osint')
-def get_osint_data(): return jsonify(query_db("SELECT * FROM domain_osint ORDER BY last_updated DESC LIMIT 1"))
+def get_osint_data():
+    return cached_json_response('osint', lambda: query_db("SELECT * FROM domain_osint ORDER BY last_updated DESC LIMIT 1"))
 
 @app.route('/api/recon_results')
-def get_recon_results(): return jsonify(query_db("SELECT type, finding, status_code FROM recon_results"))
+def get_recon_results(): return stream_query("SELECT type, finding, status_code FROM recon_results")
 
 @app.route('/api/url_parameters')
-def get_url_parameters(): return jsonify(query_db("SELECT url, parameter FROM url_parameters GROUP BY url, parameter"))
+def get_url_parameters(): return stream_query("SELECT DISTINCT url, parameter FROM url_parameters")
 
 @app.route('/api/record/<int:record_id>')
 def get_record_details(record_id):
     data = query_db("SELECT * FROM scraped_pages WHERE id = ?", (record_id,))
-    return jsonify(data[0] if data else {})
+    return json_response(data[0] if data else {})
+
+def read_status_file():
+    with open(STATUS_FILE, 'rb') as f: return orjson.loads(f.read())
 
 # Other routes (status, data) are simplified for brevity
 @app.route('/api/status')
 def get_status():
     try:
-        with open('status.json', 'r') as f: return jsonify(json.load(f))
-    except: return jsonify({"status": "Not Running"})
+        # Keyed on the file's mtime so a rewrite by the scraper is picked up immediately.
+        key = ('status', os.stat(STATUS_FILE).st_mtime_ns)
+        return cached_json_response(key, read_status_file)
+    except: return json_response({"status": "Not Running"})
+
+def encode_cursor(row):
+    return base64.urlsafe_b64encode(f"{row['scraped_at']}|{row['id']}".encode()).decode()
+
+def decode_cursor(cursor):
+    scraped_at, _, record_id = base64.urlsafe_b64decode(cursor.encode()).decode().rpartition('|')
+    return scraped_at, int(record_id)
+
+def build_fts_query(search):
+    # Quote each term so user input can't inject FTS5 syntax, and prefix-match the terms.
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in search.split())
 
 @app.route('/api/data')
 def get_data():
-    page = request.args.get('page', 1, type=int)
+    # Keyset pagination: the cursor is the (scraped_at, id) of the last row on the previous page.
     per_page = 10
-    offset = (page - 1) * per_page
-    data = query_db("SELECT id, url, title, status_code FROM scraped_pages ORDER BY scraped_at DESC LIMIT ? OFFSET ?", (per_page, offset))
-    total = query_db("SELECT COUNT(*) as count FROM scraped_pages")[0]['count']
-    return jsonify({"data": data, "total": total, "page": page, "per_page": per_page})
+    cursor = request.args.get('cursor')
+    try:
+        scraped_at, last_id = decode_cursor(cursor) if cursor else (None, None)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return json_response({"error": "Invalid cursor"}), 400
+    conditions, params = [], []
+    if cursor:
+        # A bare row-value comparison lets SQLite seek on idx_pages_scraped_at_id instead of scanning to the cursor.
+        conditions.append("(scraped_at, id) < (?, ?)")
+        params += [scraped_at, last_id]
+    fts_query = build_fts_query(request.args.get('search', ''))
+    if fts_query:
+        conditions.append("id IN (SELECT rowid FROM scraped_pages_fts WHERE scraped_pages_fts MATCH ?)")
+        params.append(fts_query)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = query_db(f"""SELECT id, url, title, status_code, language, scraped_at FROM scraped_pages
+                        {where}
+                        ORDER BY scraped_at DESC, id DESC LIMIT ?""", (*params, per_page + 1))
+    has_more = len(rows) > per_page
+    data = rows[:per_page]
+    next_cursor = encode_cursor(data[-1]) if has_more else None
+    return json_response({"data": data, "next_cursor": next_cursor, "has_more": has_more, "per_page": per_page})
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
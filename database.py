@@ -3,8 +3,24 @@ import sqlite3
 from pydantic import BaseModel
 
 class Database:
+    # Enough room in the connection's statement cache to keep every insert below prepared.
+    CACHED_STATEMENTS = 256
+
+    INSERT_ITEM_SQL = """INSERT OR IGNORE INTO scraped_pages (url, title, text_content, status_code, language,
+        structured_data, technologies, emails, social_links, image_metadata, interesting_files,
+        js_analysis, cloud_buckets) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?);"""
+    INSERT_OSINT_SQL = """INSERT INTO domain_osint (domain, dns_records, shodan_info) VALUES (?,?,?)
+        ON CONFLICT(domain) DO UPDATE SET dns_records=excluded.dns_records, shodan_info=excluded.shodan_info;"""
+    INSERT_RECON_SQL = "INSERT OR IGNORE INTO recon_results (type, finding, status_code) VALUES (?,?,?);"
+    INSERT_URL_PARAMETER_SQL = "INSERT OR IGNORE INTO url_parameters (url, parameter) VALUES (?,?);"
+
     def __init__(self, db_file):
-        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn = sqlite3.connect(db_file, check_same_thread=False, cached_statements=self.CACHED_STATEMENTS)
+        self.conn.executescript("""
+        PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA cache_size=-131072;
+        PRAGMA mmap_size=1073741824; PRAGMA temp_store=MEMORY; PRAGMA busy_timeout=5000;
+        PRAGMA wal_autocheckpoint=1000;
+        """)
         self.create_tables()
 
     def create_tables(self):
@@ -16,6 +32,7 @@ class Database:
             image_metadata TEXT, interesting_files TEXT, js_analysis TEXT, cloud_buckets TEXT,
             scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );""")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_pages_scraped_at_id ON scraped_pages(scraped_at DESC, id DESC);")
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS domain_osint (
             id INTEGER PRIMARY KEY, domain TEXT UNIQUE, dns_records TEXT, shodan_info TEXT,
@@ -25,41 +42,66 @@ class Database:
         CREATE TABLE IF NOT EXISTS recon_results (
             id INTEGER PRIMARY KEY, type TEXT, finding TEXT UNIQUE, status_code INTEGER
         );""")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_recon_cover ON recon_results(type, finding, status_code);")
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS url_parameters (
             id INTEGER PRIMARY KEY, url TEXT, parameter TEXT, UNIQUE(url, parameter)
         );""")
         self._add_column_if_not_exists(cursor, 'scraped_pages', 'cloud_buckets', 'TEXT')
+        self._create_search_index(cursor)
         self.conn.commit()
 
+    def _create_search_index(self, cursor):
+        """Maintains an FTS5 index over page URLs and titles for dashboard search."""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='scraped_pages_fts'")
+        exists = cursor.fetchone() is not None
+        cursor.executescript("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS scraped_pages_fts USING fts5(
+            url, title, content='scraped_pages', content_rowid='id'
+        );
+        CREATE TRIGGER IF NOT EXISTS scraped_pages_fts_ai AFTER INSERT ON scraped_pages BEGIN
+            INSERT INTO scraped_pages_fts(rowid, url, title) VALUES (new.id, new.url, new.title);
+        END;
+        CREATE TRIGGER IF NOT EXISTS scraped_pages_fts_ad AFTER DELETE ON scraped_pages BEGIN
+            INSERT INTO scraped_pages_fts(scraped_pages_fts, rowid, url, title) VALUES ('delete', old.id, old.url, old.title);
+        END;
+        CREATE TRIGGER IF NOT EXISTS scraped_pages_fts_au AFTER UPDATE ON scraped_pages BEGIN
+            INSERT INTO scraped_pages_fts(scraped_pages_fts, rowid, url, title) VALUES ('delete', old.id, old.url, old.title);
+            INSERT INTO scraped_pages_fts(rowid, url, title) VALUES (new.id, new.url, new.title);
+        END;
+        """)
+        if not exists:
+            # Index pages scraped before the FTS table was introduced.
+            cursor.execute("INSERT INTO scraped_pages_fts(scraped_pages_fts) VALUES ('rebuild')")
+
     def _add_column_if_not_exists(self, cursor, table, column, type):
         cursor.execute(f"PRAGMA table_info({table})")
         if column not in [info[1] for info in cursor.fetchall()]:
             cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {type}")
 
-    def insert_item(self, item: BaseModel):
-        sql = """INSERT OR IGNORE INTO scraped_pages (url, title, text_content, status_code, language,
-            structured_data, technologies, emails, social_links, image_metadata, interesting_files,
-            js_analysis, cloud_buckets) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?);"""
-        self.conn.execute(sql, (str(item.url), item.title, item.text_content, item.status_code,
-            item.language, item.structured_data, item.technologies, item.emails, item.social_links,
-            item.image_metadata, item.interesting_files, item.js_analysis, item.cloud_buckets))
-        self.conn.commit()
+    @staticmethod
+    def _item_rows(items):
+        return [(str(item.url), item.title, item.text_content, item.status_code, item.language, item.structured_data,
+                 item.technologies, item.emails, item.social_links, item.image_metadata, item.interesting_files,
+                 item.js_analysis, item.cloud_buckets) for item in items]
+
+    def insert_many(self, items: list[BaseModel], url_parameters: list[BaseModel]):
+        """Writes pages and URL parameters together in a single transaction."""
+        with self.conn:
+            self.conn.executemany(self.INSERT_ITEM_SQL, self._item_rows(items))
+            self.conn.executemany(self.INSERT_URL_PARAMETER_SQL, [(p.url, p.parameter) for p in url_parameters])
 
     def insert_osint_data(self, data: BaseModel):
-        sql = """INSERT INTO domain_osint (domain, dns_records, shodan_info) VALUES (?,?,?)
-                 ON CONFLICT(domain) DO UPDATE SET dns_records=excluded.dns_records, shodan_info=excluded.shodan_info;"""
-        self.conn.execute(sql, (data.domain, data.dns_records, data.shodan_info))
+        self.conn.execute(self.INSERT_OSINT_SQL, (data.domain, data.dns_records, data.shodan_info))
         self.conn.commit()
 
     def insert_recon_result(self, data: BaseModel):
-        sql = "INSERT OR IGNORE INTO recon_results (type, finding, status_code) VALUES (?,?,?);"
-        self.conn.execute(sql, (data.type, data.finding, data.status_code))
+        self.conn.execute(self.INSERT_RECON_SQL, (data.type, data.finding, data.status_code))
         self.conn.commit()
 
     def insert_url_parameter(self, data: BaseModel):
-        sql = "INSERT OR IGNORE INTO url_parameters (url, parameter) VALUES (?,?);"
-        self.conn.execute(sql, (data.url, data.parameter))
+        self.conn.execute(self.INSERT_URL_PARAMETER_SQL, (data.url, data.parameter))
         self.conn.commit()
 
-    def close(self): self.conn.close()
+    def close(self):
+        self.conn.close()
@@ -5,6 +5,9 @@ import sqlite3
 class Exporter:
     """Handles exporting data from the database to a CSV file."""
 
+    FETCH_SIZE = 10000
+    WRITE_BUFFER_SIZE = 1 << 20
+
     def __init__(self, db_file):
         self.db_file = db_file
 
@@ -23,18 +26,22 @@ class Exporter:
 
         try:
             with sqlite3.connect(self.db_file) as conn:
-                conn.row_factory = sqlite3.Row
+                # Plain tuples are all the CSV writer needs and are cheaper than sqlite3.Row.
+                conn.row_factory = None
                 cursor = conn.cursor()
 
                 query = f"SELECT {', '.join(columns)} FROM scraped_pages"
                 
                 cursor.execute(query)
                 
-                with open(output_file_path, 'w', newline='', encoding='utf-8') as f:
+                with open(output_file_path, 'w', newline='', encoding='utf-8', buffering=self.WRITE_BUFFER_SIZE) as f:
                     writer = csv.writer(f)
                     writer.writerow(columns)
-                    for row in cursor:
-                        writer.writerow(row)
+                    while True:
+                        chunk = cursor.fetchmany(self.FETCH_SIZE)
+                        if not chunk:
+                            break
+                        writer.writerows(chunk)
             
             logging.info("Export completed successfully.")
             return True
@@ -1,49 +1,89 @@
 import asyncio
 import logging
-import re
-import socket
+from collections import OrderedDict
 from io import BytesIO
 from urllib.parse import urljoin
 
 import aiohttp
-import dns.resolver
+import orjson
+import dns.asyncresolver
 import shodan
 from PIL import Image
-from PIL.ExifTags import TAGS
+from PIL.ExifTags import IFD, TAGS
+
+try:
+    # RE2 matches in linear time, so hostile HTML can't trigger catastrophic backtracking.
+    import re2 as re
+except ImportError:
+    import re
 
 # Regexes
-EMAIL_REGEX = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+# Page patterns are bytes patterns: the page is encoded once and only matched substrings are decoded.
+# Bounded quantifiers (RFC 5321 local-part/domain limits) keep a failed match from scanning long runs.
+EMAIL_REGEX = re.compile(rb'\b[a-zA-Z0-9._%+-]{1,64}@[a-zA-Z0-9.-]{1,253}\.[a-zA-Z]{2,24}\b')
 SOCIAL_REGEX = {
-    'linkedin': re.compile(r'https?://(?:www\.)?linkedin\.com/(?:in|company)/[a-zA-Z0-9_-]+/?'),
-    'twitter': re.compile(r'https?://(?:www\.)?twitter\.com/[a-zA-Z0-9_]{1,15}/?'),
-    'github': re.compile(r'https?://(?:www\.)?github\.com/[a-zA-Z0-9_-]+/?'),
+    'linkedin': re.compile(rb'\bhttps?://(?:www\.)?linkedin\.com/(?:in|company)/[a-zA-Z0-9_-]+/?'),
+    'twitter': re.compile(rb'\bhttps?://(?:www\.)?twitter\.com/[a-zA-Z0-9_]{1,15}/?'),
+    'github': re.compile(rb'\bhttps?://(?:www\.)?github\.com/[a-zA-Z0-9_-]+/?'),
 }
-JS_PATH_REGEX = re.compile(r'["\'](/api/|/v[1-9]/|/wp-json/|/graphql)[a-zA-Z0-9/_-]*["\']')
+# Bucket paths stop at quotes, whitespace and tag delimiters, so an unquoted URL in text can't swallow
+# the emails and links after it in the fused scan below.
 CLOUD_BUCKET_REGEX = {
-    's3': re.compile(r'https?://[a-zA-Z0-9.-]+\.s3\.[a-zA-Z0-9.-]+\.amazonaws\.com/[^"\']+'),
-    'azure': re.compile(r'https?://[a-zA-Z0-9]+\.blob\.core\.windows\.net/[^"\']+'),
-    'gcp': re.compile(r'https?://storage\.googleapis\.com/[a-zA-Z0-9.-]+/[^"\']+')
+    's3': re.compile(rb'\bhttps?://[a-zA-Z0-9.-]+\.s3\.[a-zA-Z0-9.-]+\.amazonaws\.com/[^"\'\s<>]+'),
+    'azure': re.compile(rb'\bhttps?://[a-zA-Z0-9]+\.blob\.core\.windows\.net/[^"\'\s<>]+'),
+    'gcp': re.compile(rb'\bhttps?://storage\.googleapis\.com/[a-zA-Z0-9.-]+/[^"\'\s<>]+')
 }
+JS_PATH_REGEX = re.compile(r'["\'](/api/|/v[1-9]/|/wp-json/|/graphql)[a-zA-Z0-9/_-]*["\']')
+
+# Every page pattern fused into one alternation so a page is scanned once. Matches are bucketed
+# by group index, since RE2 reports group names of bytes patterns as bytes.
+PAGE_SCAN_KINDS = (*SOCIAL_REGEX, 'email', *CLOUD_BUCKET_REGEX)
+PAGE_SCAN_REGEX = re.compile(b'|'.join(b'(%s)' % pattern.pattern for pattern in
+                                       (*SOCIAL_REGEX.values(), EMAIL_REGEX, *CLOUD_BUCKET_REGEX.values())))
+
+# Bound matcher methods, looked up once instead of on every crawled page.
+_iter_page_matches = PAGE_SCAN_REGEX.finditer
+_find_js_paths = JS_PATH_REGEX.findall
+
+def scan_page(html_bytes):
+    """
+    Finds emails, social profile links and cloud storage URLs in one pass over a page's encoded HTML.
 
-def find_cloud_buckets(html_content):
-    """Finds potential cloud storage URLs in HTML."""
-    buckets = {}
-    for provider, pattern in CLOUD_BUCKET_REGEX.items():
-        found = list(set(pattern.findall(html_content)))
-        if found:
-            buckets[provider] = found
-    return buckets
+    Returns:
+        tuple: ({"emails": [...], "social_links": {...}}, {provider: [urls]})
+    """
+    hits = {}
+    for match in _iter_page_matches(html_bytes):
+        hits.setdefault(PAGE_SCAN_KINDS[match.lastindex - 1], set()).add(match.group().decode('utf-8', 'ignore'))
+    contacts = {"emails": list(hits.get('email', ())),
+                "social_links": {p: list(hits[p]) for p in SOCIAL_REGEX if p in hits}}
+    buckets = {p: list(hits[p]) for p in CLOUD_BUCKET_REGEX if p in hits}
+    return contacts, buckets
 
 # All other OSINT functions remain the same
+DNS_RECORD_TYPES = ('A', 'AAAA', 'MX', 'TXT', 'NS', 'CNAME')
+# Bounds each lookup so a dead nameserver can't stall OSINT for the resolver's default timeout.
+DNS_LIFETIME = 5.0
+_dns_resolver = None
+
+def _get_dns_resolver():
+    global _dns_resolver
+    if _dns_resolver is None:
+        _dns_resolver = dns.asyncresolver.Resolver()
+        _dns_resolver.lifetime = DNS_LIFETIME
+    return _dns_resolver
+
 async def get_dns_records(domain):
-    records = {}
-    for r_type in ['A', 'AAAA', 'MX', 'TXT', 'NS', 'CNAME']:
-        try:
-            answers = await dns.resolver.resolve_async(domain, r_type)
-            records[r_type] = [str(r) for r in answers]
-        except Exception:
-            records[r_type] = []
-    return records
+    """Looks up every DNS_RECORD_TYPES record for domain at once; failed lookups map to an empty list."""
+    try:
+        resolver = _get_dns_resolver()
+    except Exception as e: # e.g. no usable /etc/resolv.conf
+        logging.warning(f"DNS resolver unavailable: {e}")
+        return {r_type: [] for r_type in DNS_RECORD_TYPES}
+    results = await asyncio.gather(*[resolver.resolve(domain, r_type) for r_type in DNS_RECORD_TYPES],
+                                   return_exceptions=True)
+    return {r_type: [] if isinstance(answers, Exception) else [str(r) for r in answers]
+            for r_type, answers in zip(DNS_RECORD_TYPES, results)}
 
 async def query_wayback_machine(session, domain):
     logging.info(f"Querying Wayback Machine for {domain}...")
@@ -51,7 +91,7 @@ async def query_wayback_machine(session, domain):
     try:
         async with session.get(url, timeout=20) as r:
             if r.status == 200:
-                data = await r.json()
+                data = await r.json(loads=orjson.loads)
                 return [entry['url'] for entry in data.get('url_list', [])]
     except Exception as e:
         logging.warning(f"Wayback Machine query failed: {e}")
@@ -61,42 +101,104 @@ async def query_shodan(api_key, domain):
     if not api_key: return {"error": "Shodan API key not configured."}
     logging.info(f"Querying Shodan for {domain}...")
     try:
-        ip = socket.gethostbyname(domain)
+        answers = await _get_dns_resolver().resolve(domain, 'A')
+        ip = str(answers[0])
         api = shodan.Shodan(api_key)
-        host = api.host(ip)
+        # The shodan client is built on blocking requests calls.
+        host = await asyncio.to_thread(api.host, ip)
         return {k: host.get(k) for k in ['ip_str', 'org', 'os', 'ports', 'hostnames', 'location', 'vulns']}
     except Exception as e:
         return {"error": str(e)}
 
-async def analyze_js_file(session, js_url):
+# Shared bundles (frameworks, analytics) recur across pages; cache their analysis by URL.
+JS_CACHE_SIZE = 1024
+_JS_CACHE = OrderedDict()
+
+# Caps concurrent script and image downloads across all crawl workers.
+JS_FETCH_SEMAPHORE = asyncio.Semaphore(16)
+IMAGE_FETCH_SEMAPHORE = asyncio.Semaphore(16)
+
+async def _fetch_js_paths(session, js_url):
+    """Returns the API paths a script references, or None if the fetch failed in a way worth retrying."""
     try:
-        async with session.get(js_url, timeout=15) as r:
+        async with JS_FETCH_SEMAPHORE, session.get(js_url, timeout=15) as r:
             if r.status == 200:
-                return list(set(JS_PATH_REGEX.findall(await r.text())))
+                return list(set(_find_js_paths(await r.text())))
+            if r.status < 500:
+                return []
     except Exception: pass
-    return []
+    return None
+
+async def analyze_js_file(session, js_url):
+    if js_url in _JS_CACHE:
+        _JS_CACHE.move_to_end(js_url)
+        return await asyncio.shield(_JS_CACHE[js_url])
+    future = asyncio.get_running_loop().create_future()
+    _JS_CACHE[js_url] = future
+    if len(_JS_CACHE) > JS_CACHE_SIZE:
+        _JS_CACHE.popitem(last=False)
+    try:
+        paths = await _fetch_js_paths(session, js_url)
+    except BaseException:
+        _JS_CACHE.pop(js_url, None)
+        future.cancel()
+        raise
+    if paths is None:
+        # A timeout or server error isn't the script's answer; evict it so a later page retries.
+        _JS_CACHE.pop(js_url, None)
+        paths = []
+    future.set_result(paths)
+    return paths
 
-async def find_and_analyze_js(soup, base_url, session):
-    urls = [urljoin(base_url, s['src']) for s in soup.find_all('script', src=True)]
+async def find_and_analyze_js(urls, session):
     results = await asyncio.gather(*[analyze_js_file(session, url) for url in urls])
     return {url: paths for url, paths in zip(urls, results) if paths}
 
-async def extract_contacts_and_socials(html_content, base_url):
-    emails = set(EMAIL_REGEX.findall(html_content))
-    socials = {p: list(set(r.findall(html_content))) for p, r in SOCIAL_REGEX.items() if r.search(html_content)}
-    return {"emails": list(emails), "social_links": socials}
+_EXIF_TAG_NAME = TAGS.get
+
+# Caps how many images are decoded in worker threads at once.
+EXIF_DECODE_SEMAPHORE = asyncio.Semaphore(4)
+
+def _decode_exif(image_bytes):
+    # getexif() works for TIFF as well as JPEG, but leaves the Exif and GPS sub-IFDs as offsets; merge them back in.
+    exif = Image.open(BytesIO(image_bytes)).getexif()
+    tags = {**exif, **exif.get_ifd(IFD.Exif)}
+    if gps := exif.get_ifd(IFD.GPSInfo):
+        tags[IFD.GPSInfo] = gps
+    return {_EXIF_TAG_NAME(t, t): v if isinstance(v, str) else str(v) for t, v in tags.items()} or None
+
+# Only these formats carry EXIF in practice, and it sits in the first segment of the file.
+EXIF_CONTENT_TYPES = ('image/jpeg', 'image/tiff')
+EXIF_HEAD_BYTES = 65536
+JPEG_SOI, JPEG_APP1 = b'\xff\xd8\xff', b'\xff\xe1'
+
+def _may_have_exif(head):
+    """JPEGs without an APP1 segment carry no EXIF; TIFF headers are EXIF structures themselves."""
+    if head.startswith(JPEG_SOI):
+        return JPEG_APP1 in head
+    return head.startswith((b'II*\x00', b'MM\x00*'))
+
+async def read_head(response, limit):
+    head = bytearray()
+    while len(head) < limit and (chunk := await response.content.read(limit - len(head))):
+        head += chunk
+    return bytes(head)
 
 async def get_image_exif(session, image_url):
     try:
-        async with session.get(image_url, timeout=10) as r:
-            if r.status != 200: return None
-            img = Image.open(BytesIO(await r.read()))
-            exif = img._getexif()
-            return {TAGS.get(t, t): str(v) for t, v in exif.items()} if exif else None
+        async with IMAGE_FETCH_SEMAPHORE:
+            async with session.head(image_url, timeout=10, allow_redirects=True) as r:
+                if r.status != 200 or r.content_type not in EXIF_CONTENT_TYPES: return None
+            async with session.get(image_url, timeout=10, headers={'Range': f'bytes=0-{EXIF_HEAD_BYTES - 1}'}) as r:
+                if r.status not in (200, 206): return None
+                # Servers that ignore Range answer 200 with the whole file; only the head is ever read.
+                image_bytes = await read_head(r, EXIF_HEAD_BYTES)
+        if not _may_have_exif(image_bytes): return None
+        async with EXIF_DECODE_SEMAPHORE:
+            return await asyncio.to_thread(_decode_exif, image_bytes)
     except Exception: return None
 
-async def find_and_process_images(soup, base_url, session):
-    urls = [urljoin(base_url, img['src']) for img in soup.find_all('img', src=True)][:5]
+async def find_and_process_images(urls, session):
     results = await asyncio.gather(*[get_image_exif(session, url) for url in urls])
     return {url: exif for url, exif in zip(urls, results) if exif}
 
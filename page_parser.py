@@ -0,0 +1,134 @@
+import functools
+import zlib
+from itertools import islice
+
+from lxml import etree
+from selectolax.lexbor import LexborHTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from osint_utils import scan_page
+
+MAX_IMAGES = 5
+# CLD3's accuracy saturates well before this, so longer pages are only scored on their opening text.
+LANGUAGE_SAMPLE_CHARS = 1000
+# RDFa and Dublin Core are rare and slow to extract; each syntax is its own pass over the page.
+STRUCTURED_DATA_SYNTAXES = ['json-ld', 'opengraph', 'microdata']
+# Every supported syntax leaves one of these in the markup; pages without any skip extruct entirely.
+STRUCTURED_DATA_HINTS = ('application/ld+json', 'itemscope', '"og:', "'og:", '=og:')
+# Elements whose contents are code or markup rather than readable text.
+NON_TEXT_TAGS = ['script', 'style', 'template']
+
+# The sitemap protocol caps a file at 50 MB uncompressed; a larger body or gzip expansion is refused.
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+# Sitemaps come from the crawled site; never expand entities or fetch external DTDs.
+_SITEMAP_XML_PARSER = etree.XMLParser(recover=True, resolve_entities=False, no_network=True)
+
+@functools.lru_cache(maxsize=None)
+def _language_identifier():
+    """Builds the CLD3 model once per process, on first use."""
+    import gcld3
+    return gcld3.NNetLanguageIdentifier(min_num_bytes=0, max_num_bytes=LANGUAGE_SAMPLE_CHARS)
+
+def parse_sitemap(body):
+    """
+    Parses a sitemap or sitemap index, gzipped or not.
+
+    Returns:
+        tuple: (sub-sitemap URLs, page URLs).
+    """
+    if body.startswith(b'\x1f\x8b'):
+        # Decompress with an output cap so a gzip bomb can't exhaust the worker's memory.
+        body = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16).decompress(body, SITEMAP_MAX_BYTES + 1)
+        if len(body) > SITEMAP_MAX_BYTES:
+            raise ValueError(f"sitemap expands beyond {SITEMAP_MAX_BYTES} bytes")
+    root = etree.fromstring(body, parser=_SITEMAP_XML_PARSER)
+    sitemaps, pages = [], []
+    if root is None:
+        return sitemaps, pages
+    for loc in root.iter('{*}loc'):
+        url = (loc.text or '').strip()
+        if url:
+            (sitemaps if etree.QName(loc.getparent()).localname == 'sitemap' else pages).append(url)
+    return sitemaps, pages
+
+def _attribute_values(nodes, name):
+    for node in nodes:
+        value = node.attributes.get(name)
+        if value is not None:
+            yield value
+
+def _url_resolver(base):
+    """
+    Returns a function resolving hrefs against base with the fragment dropped.
+
+    Absolute and root-relative hrefs, the bulk of most pages, skip urljoin entirely.
+    """
+    parts = urlsplit(base)
+    origin = f"{parts.scheme}://{parts.netloc}"
+
+    def resolve(href):
+        if href.startswith(('http://', 'https://')):
+            return href.partition('#')[0]
+        if href.startswith('/') and not href.startswith('//') and '/.' not in href:
+            return origin + href.partition('#')[0]
+        return urljoin(base, href).partition('#')[0]
+    return resolve
+
+def parse_html(html_content, url, base_url, options):
+    """
+    Parses a crawled page into plain, picklable data.
+
+    This is CPU-bound and runs in the scraper's process pool, so it must not touch scraper state.
+
+    Args:
+        html_content (str): The HTML content of the page.
+        url (str): The URL of the page, used to resolve script and image sources.
+        base_url (str): The crawl's start URL, used to resolve links.
+        options (dict): Parser settings snapshotted from the scraper config.
+
+    Returns:
+        dict: The page's title, text, language, structured data, contacts, cloud buckets,
+            links, pagination links, script URLs and image URLs.
+    """
+    tree = LexborHTMLParser(html_content)
+
+    for selector in options['exclude_selectors']:
+        for node in tree.css(selector):
+            node.decompose()
+    title_node = tree.css_first('title')
+    title = title_node.text(strip=True) if title_node else ""
+    title = title or "No Title"
+
+    resolve_link, resolve_asset = _url_resolver(base_url), _url_resolver(url)
+    links = [resolve_link(href) for href in _attribute_values(tree.css('a[href]'), 'href')]
+    pagination_links = {resolve_link(href)
+                        for selector in options['pagination_selectors']
+                        for href in _attribute_values(tree.css(selector), 'href') if href}
+    script_urls = list(dict.fromkeys(resolve_asset(src) for src in _attribute_values(tree.css('script[src]'), 'src')))
+    image_urls = [resolve_asset(src) for src in islice(_attribute_values(tree.css('img[src]'), 'src'), MAX_IMAGES)]
+
+    tree.strip_tags(NON_TEXT_TAGS)
+    # Whitespace-only text nodes come back as empty pieces; collapse the runs they leave behind.
+    text = ' '.join(tree.root.text(separator=' ', strip=True).split()) if tree.root else ""
+
+    language = None
+    if options['detect_language'] and text:
+        language = _language_identifier().FindLanguage(text=text[:LANGUAGE_SAMPLE_CHARS]).language
+        if language == 'und': language = None
+    structured_data = {}
+    if options['extract_structured_data'] and any(hint in html_content for hint in STRUCTURED_DATA_HINTS):
+        import extruct
+        structured_data = extruct.extract(html_content, base_url=url, syntaxes=STRUCTURED_DATA_SYNTAXES,
+                                          errors='log')
+
+    contacts, cloud_buckets = {}, {}
+    if options['extract_contacts'] or options['find_cloud_buckets']:
+        contacts, cloud_buckets = scan_page(html_content.encode('utf-8'))
+        if not options['extract_contacts']: contacts = {}
+        if not options['find_cloud_buckets']: cloud_buckets = {}
+
+    return {
+        "title": title, "text": text, "language": language, "structured_data": structured_data,
+        "contacts": contacts, "cloud_buckets": cloud_buckets, "links": links,
+        "pagination_links": pagination_links, "script_urls": script_urls, "image_urls": image_urls,
+    }
@@ -2,21 +2,62 @@ import asyncio
 import logging
 from urllib.parse import urljoin
 
-async def enumerate_subdomains(domain, wordlist_path, session):
+import dns.asyncresolver
+
+# Most wordlist names don't exist; a short DNS lookup rules them out without spending an HTTP timeout.
+SUBDOMAIN_DNS_LIFETIME = 2.0
+
+async def _probe_wordlist(wordlist_path, probe, concurrency):
+    """
+    Streams a wordlist into `concurrency` workers that run `probe` on each entry.
+
+    Only `concurrency` probes exist at a time, so memory stays flat regardless of the wordlist size.
+    Raises FileNotFoundError before any worker starts if the wordlist is missing.
+    """
+    with open(wordlist_path, 'r') as f:
+        queue = asyncio.Queue(maxsize=concurrency * 2)
+        found = []
+
+        async def worker():
+            while (entry := await queue.get()) is not None:
+                result = await probe(entry)
+                if result:
+                    found.append(result)
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            for line in f:
+                entry = line.strip()
+                if entry:
+                    await queue.put(entry)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+    return found
+
+async def enumerate_subdomains(domain, wordlist_path, session, concurrency=50):
     """
-    Performs DNS brute-force to find valid subdomains.
+    Performs DNS brute-force to find valid subdomains, with at most `concurrency` probes in flight.
+
+    Only names with an A record are probed over HTTP.
     """
     logging.info(f"Starting subdomain enumeration for {domain} using {wordlist_path}")
-    found_subdomains = []
     try:
-        with open(wordlist_path, 'r') as f:
-            subdomains = [line.strip() for line in f if line.strip()]
-    except FileNotFoundError:
-        logging.error(f"Subdomain wordlist not found at: {wordlist_path}")
+        resolver = dns.asyncresolver.Resolver()
+    except Exception as e: # e.g. no usable /etc/resolv.conf
+        logging.error(f"DNS resolver unavailable, skipping subdomain enumeration: {e}")
         return []
+    resolver.lifetime = SUBDOMAIN_DNS_LIFETIME
 
     async def check_subdomain(sub):
         target = f"http://{sub}.{domain}"
+        try:
+            await resolver.resolve(f"{sub}.{domain}", 'A')
+        except Exception: # NXDOMAIN, no A record or timeout: nothing to probe over HTTP
+            return None
         try:
             async with session.head(target, timeout=5, allow_redirects=False) as response:
                 if response.status < 500: # Consider any non-server-error response as potentially valid
@@ -28,25 +69,20 @@ async def enumerate_subdomains(domain, wordlist_path, session):
             pass
         return None
 
-    tasks = [check_subdomain(sub) for sub in subdomains]
-    results = await asyncio.gather(*tasks)
-    
-    found_subdomains = [res for res in results if res]
+    try:
+        found_subdomains = await _probe_wordlist(wordlist_path, check_subdomain, concurrency)
+    except FileNotFoundError:
+        logging.error(f"Subdomain wordlist not found at: {wordlist_path}")
+        return []
+
     logging.info(f"Subdomain enumeration finished. Found {len(found_subdomains)} subdomains.")
     return found_subdomains
 
-async def brute_force_directories(base_url, wordlist_path, session):
+async def brute_force_directories(base_url, wordlist_path, session, concurrency=50):
     """
-    Brute-forces common directory and file names.
+    Brute-forces common directory and file names, with at most `concurrency` probes in flight.
     """
     logging.info(f"Starting content discovery on {base_url} using {wordlist_path}")
-    found_paths = []
-    try:
-        with open(wordlist_path, 'r') as f:
-            paths = [line.strip() for line in f if line.strip()]
-    except FileNotFoundError:
-        logging.error(f"Directory wordlist not found at: {wordlist_path}")
-        return []
 
     async def check_path(path):
         target = urljoin(base_url, path)
@@ -61,9 +97,11 @@ async def brute_force_directories(base_url, wordlist_path, session):
             pass
         return None
 
-    tasks = [check_path(path) for path in paths]
-    results = await asyncio.gather(*tasks)
-    
-    found_paths = [res for res in results if res]
+    try:
+        found_paths = await _probe_wordlist(wordlist_path, check_path, concurrency)
+    except FileNotFoundError:
+        logging.error(f"Directory wordlist not found at: {wordlist_path}")
+        return []
+
     logging.info(f"Content discovery finished. Found {len(found_paths)} paths.")
     return found_paths
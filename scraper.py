@@ -1,32 +1,34 @@
 import argparse
 import asyncio
 import configparser
-import json
+import contextlib
+import datetime
+import functools
 import logging
+import multiprocessing
 import os
 import random
 import re
 import time
 from collections import deque
-from urllib.parse import urljoin, urlparse, parse_qs
-from urllib.robotparser import RobotFileParser
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urljoin, urlparse, urlsplit, parse_qs
 
+import aiofiles
 import aiohttp
-import extruct
-from bs4 import BeautifulSoup
+import msgpack
+import orjson
 from dotenv import load_dotenv
-from fake_useragent import UserAgent
-from langdetect import detect, LangDetectException
-from playwright.async_api import async_playwright, Error as PlaywrightError
-from playwright_stealth import stealth_async
+from pybloom_live import ScalableBloomFilter
+from protego import Protego
 from pydantic import BaseModel, ValidationError, HttpUrl
-from tldextract import extract
 
-from captcha_solver import CaptchaSolver
 from database import Database
-from osint_utils import (extract_contacts_and_socials, find_and_process_images,
+from osint_utils import (find_and_process_images,
                          check_interesting_files, get_dns_records, query_wayback_machine,
-                         query_shodan, find_and_analyze_js, find_cloud_buckets)
+                         query_shodan, find_and_analyze_js, read_head)
+from page_parser import SITEMAP_MAX_BYTES, parse_html, parse_sitemap
 from recon_tools import enumerate_subdomains, brute_force_directories
 from tech_fingerprinter import TechFingerprinter
 
@@ -35,6 +37,97 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 scraper_logger = logging.getLogger('scraper')
 load_dotenv()
 COMMAND_FILE = 'command.json'
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+# Current desktop browsers; a fixed list avoids fake-useragent's blocking download on first use.
+USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36 Edg/140.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36 Edg/139.0.0.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36 Edg/140.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:143.0) Gecko/20100101 Firefox/143.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:142.0) Gecko/20100101 Firefox/142.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:143.0) Gecko/20100101 Firefox/143.0",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:143.0) Gecko/20100101 Firefox/143.0",
+    "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:142.0) Gecko/20100101 Firefox/142.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/26.0 Safari/605.1.15",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.6 Safari/605.1.15",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36 OPR/124.0.0.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36 OPR/123.0.0.0",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
+)
+VISITED_INITIAL_CAPACITY = 100_000
+VISITED_ERROR_RATE = 0.001
+VISITED_LOG_BUFFER_SIZE = 1 << 16
+SITEMAP_CONCURRENCY = 32
+STATE_SAVE_INTERVAL = 5.0
+DB_QUEUE_SIZE = 1000
+DB_WRITE_BATCH_SIZE = 100
+HOST_CONCURRENCY = 8
+# A proxy that fails this many page loads in a row is benched for PROXY_COOLDOWN seconds.
+PROXY_MAX_CONSECUTIVE_ERRORS = 3
+PROXY_COOLDOWN = 60.0
+# robots.txt is matched with one fixed token; sites' rules for '*' apply to it.
+ROBOTS_USER_AGENT = 'scraper-bot'
+ROBOTS_TTL = 6 * 3600
+# Google only honours the first 500 KiB of robots.txt; anything after it is ignored.
+ROBOTS_MAX_BYTES = 500 * 1024
+
+def to_json(obj):
+    """Serialises a field for storage; extruct output can carry non-str keys and non-JSON values."""
+    return orjson.dumps(obj, default=str, option=ORJSON_OPTIONS).decode()
+
+# The crawler only reads the DOM; these downloads are pure overhead in the browser.
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'media', 'font', 'stylesheet'})
+BLOCKED_HOST_SUFFIXES = ('google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+                         'facebook.net', 'hotjar.com', 'adservice.google.com')
+
+async def _block_unneeded_requests(route):
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or (urlsplit(request.url).hostname or '').endswith(BLOCKED_HOST_SUFFIXES):
+        await route.abort()
+    else:
+        await route.continue_()
+
+# Links to these are assets, not pages; str.endswith tests the whole tuple in one call.
+SKIPPED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.ico', '.css', '.js', '.woff', '.woff2',
+                      '.pdf', '.zip', '.mp3', '.mp4')
+
+# Pages link to the same navigation URLs over and over; repeat checks are a cache hit.
+@functools.lru_cache(maxsize=65536)
+def check_url(url, scope_regex, whitelist_regex, blacklist_regex, robot_parser):
+    """Returns (is_valid, reason) for a URL against the crawl scope, the configured URL filters and robots.txt."""
+    if not scope_regex.match(url):
+        return False, "External domain" if url.lower().startswith(('http://', 'https://')) else "Invalid scheme"
+    if url.partition('?')[0].lower().endswith(SKIPPED_EXTENSIONS):
+        return False, "Static asset"
+    if whitelist_regex and not whitelist_regex.search(url):
+        return False, "Not whitelisted"
+    if blacklist_regex and blacklist_regex.search(url):
+        return False, "Blacklisted"
+    if robot_parser and not robot_parser.can_fetch(url, ROBOTS_USER_AGENT):
+        return False, "Disallowed by robots.txt"
+    return True, "Valid"
+
+def _compile_patterns(lines):
+    """Fuses a multi-line config value of regexes into one alternation, or None if it lists none."""
+    patterns = [line.strip() for line in lines.splitlines() if line.strip() and not line.strip().startswith('#')]
+    return re.compile('|'.join(f'(?:{p})' for p in patterns)) if patterns else None
+
+async def write_file_atomic(path, data):
+    """Writes bytes to a temp file off the event loop, then swaps it in so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    async with aiofiles.open(tmp_path, 'wb') as f:
+        await f.write(data)
+    os.replace(tmp_path, path)
+
+def _format_duration(seconds):
+    return str(datetime.timedelta(seconds=int(seconds)))
 
 # --- Data Validation Models ---
 class ScrapedItem(BaseModel):
@@ -70,22 +163,31 @@ class AdvancedWebScraper:
     def __init__(self, config):
         self.config = config
         self.base_url = config.get('main', 'start_url')
+        # tldextract loads the public suffix list; importing it here keeps it out of the spawned parse workers.
+        from tldextract import extract
         self.domain = extract(self.base_url).registered_domain
         self.database_file = config.get('main', 'database_file')
         self.max_concurrent_tasks = config.getint('main', 'tasks')
         self.delay_min = config.getfloat('main', 'delay_min', fallback=1.0)
         self.delay_max = config.getfloat('main', 'delay_max', fallback=3.0)
+        self.ajax_wait_selector = config.get('main', 'ajax_wait_selector', fallback='').strip() or None
+        self._host_semaphores = {}
+        self._host_next_start = {}
         
         self.url_queue = asyncio.Queue()
-        self.visited_urls = set()
-        self.lock = asyncio.Lock()
+        # Mirrors url_queue's contents in order so the pending URLs can be snapshotted without reaching into the queue.
+        self._queued_urls = deque()
+        # A Bloom filter keeps the seen-URL check at a few bits per URL on long crawls; a false
+        # positive only skips a URL (~0.1%), it never recrawls one.
+        self.visited_urls = ScalableBloomFilter(initial_capacity=VISITED_INITIAL_CAPACITY, error_rate=VISITED_ERROR_RATE)
         
-        self.user_agent = UserAgent()
-        self.robot_parser = self._setup_robot_parser()
+        # Loaded once the HTTP session exists; until then, and if robots.txt is unavailable, nothing is disallowed.
+        self.robot_parser = None
+        self._robots_expires_at = 0.0
         
         self.resume_crawl = config.getboolean('main', 'resume_crawl', fallback=False)
-        self.visited_urls_file = f"{self.database_file.rsplit('.', 1)[0]}.visited.json"
-        self.queue_file = f"{self.database_file.rsplit('.', 1)[0]}.queue.txt"
+        self.visited_urls_file = f"{self.database_file.rsplit('.', 1)[0]}.visited.log"
+        self.queue_file = f"{self.database_file.rsplit('.', 1)[0]}.queue.msgpack"
         self.status_file = 'status.json'
 
         self.start_time = time.time()
@@ -95,29 +197,56 @@ class AdvancedWebScraper:
         self.status = "Initializing"
         self.should_stop = False
 
+        self._http_session = None
+        self._parse_pool = self._create_parse_pool()
+
         self.db = Database(self.database_file)
+        # Pages are written by one writer task in batches; a full queue applies backpressure to the workers.
+        self.db_queue = asyncio.Queue(maxsize=DB_QUEUE_SIZE)
         captcha_api_key = config.get('captcha', 'api_key', fallback=None)
-        self.captcha_solver = CaptchaSolver(captcha_api_key) if captcha_api_key else None
+        self.captcha_solver = None
+        if captcha_api_key:
+            from captcha_solver import CaptchaSolver
+            self.captcha_solver = CaptchaSolver(captcha_api_key)
         self.fingerprinter = TechFingerprinter()
 
         self.proxies = self._load_proxies()
         self.proxy_index = 0
+        self._proxy_health = {proxy: {'errors': 0, 'consecutive_errors': 0, 'cooldown_until': 0.0} for proxy in self.proxies}
         self.custom_headers = self._load_custom_headers()
 
         self._load_osint_settings()
         self._load_recon_settings()
         self._load_crawling_rules()
         self._load_retry_settings()
+        self._parser_options = self._build_parser_options()
         self._initialize_state()
         self._setup_log_capture()
 
     def _load_osint_settings(self):
         self.osint_config = self.config['osint'] if 'osint' in self.config else {}
         self.shodan_api_key = self.osint_config.get('shodan_api_key', fallback=None)
+        # Per-page toggles are read once here rather than through configparser on every page.
+        self._do_fingerprint = self.osint_config.getboolean('fingerprint_tech', True)
+        self._do_images = self.osint_config.getboolean('analyze_images', True)
+        self._do_files = self.osint_config.getboolean('find_hidden_files', True)
+        self._do_js = self.osint_config.getboolean('analyze_js', True)
 
     def _load_recon_settings(self):
         self.recon_config = self.config['recon'] if 'recon' in self.config else {}
 
+    def _build_parser_options(self):
+        """Snapshots the settings parse_html needs into a picklable dict for the parse pool."""
+        exclude_selectors = self.config.get('parser', 'exclude_selectors', fallback='').strip()
+        return {
+            'exclude_selectors': tuple(s.strip() for s in exclude_selectors.split(',')) if exclude_selectors else (),
+            'detect_language': self.config.getboolean('parser', 'detect_language', fallback=True),
+            'extract_structured_data': self.config.getboolean('parser', 'extract_structured_data', fallback=True),
+            'extract_contacts': self.osint_config.getboolean('extract_contacts', True),
+            'find_cloud_buckets': self.recon_config.getboolean('find_cloud_buckets', True),
+            'pagination_selectors': tuple(self.pagination_selectors),
+        }
+
     async def _run_domain_osint(self):
         """Performs OSINT tasks that apply to the entire domain."""
         scraper_logger.info(f"--- Starting Domain-Level OSINT for {self.domain} ---")
@@ -132,111 +261,170 @@ class AdvancedWebScraper:
         
         osint_data = DomainOsintData(
             domain=self.domain,
-            dns_records=json.dumps(dns_records),
-            shodan_info=json.dumps(shodan_info)
+            dns_records=to_json(dns_records),
+            shodan_info=to_json(shodan_info)
         )
         await asyncio.to_thread(self.db.insert_osint_data, osint_data)
         scraper_logger.info("--- Domain-Level OSINT Complete ---")
 
+    def _create_http_session(self):
+        """Builds the one pooled HTTP session shared by recon, OSINT helpers and all workers."""
+        # Recon fans out across many hosts at once, so the overall limit sits well above the per-host one.
+        connector = aiohttp.TCPConnector(limit=200, limit_per_host=16,
+                                         use_dns_cache=True, ttl_dns_cache=300, keepalive_timeout=75)
+        return aiohttp.ClientSession(connector=connector, headers={'User-Agent': random.choice(USER_AGENTS)})
+
+    def _create_parse_pool(self):
+        """Page parsing is CPU-bound; a process pool keeps it off the event loop and outside the GIL."""
+        return ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context('spawn'))
+
+    async def aclose(self):
+        if self._http_session:
+            await self._http_session.close()
+            self._http_session = None
+
     async def _run_reconnaissance_phase(self):
         scraper_logger.info("--- Starting Active Reconnaissance Phase ---")
-        async with aiohttp.ClientSession(headers={'User-Agent': self.user_agent.random}) as session:
-            recon_tasks = []
-            if self.recon_config.getboolean('subdomain_enum', False):
-                wordlist = self.recon_config.get('subdomain_wordlist')
-                recon_tasks.append(enumerate_subdomains(self.domain, wordlist, session))
-            
-            if self.recon_config.getboolean('dir_bruteforce', False):
-                wordlist = self.recon_config.get('dir_wordlist')
-                recon_tasks.append(brute_force_directories(self.base_url, wordlist, session))
-            
-            results = await asyncio.gather(*recon_tasks)
-            
-            # Process results and add to queue/db
-            for res_list in results:
-                for finding, status in res_list:
-                    if 'http' in finding: # It's a full URL (subdomain or dir)
-                        recon_type = 'subdomain' if self.domain in urlparse(finding).netloc else 'directory'
-                        await asyncio.to_thread(self.db.insert_recon_result, ReconResult(type=recon_type, finding=finding, status_code=status))
-                        if finding not in self.visited_urls:
-                            self.visited_urls.add(finding)
-                            await self.url_queue.put(finding)
+        session = self._http_session
+        concurrency = self.recon_config.getint('concurrency', 50)
+        recon_tasks = []
+        if self.recon_config.getboolean('subdomain_enum', False):
+            wordlist = self.recon_config.get('subdomain_wordlist')
+            recon_tasks.append(enumerate_subdomains(self.domain, wordlist, session, concurrency))
+        
+        if self.recon_config.getboolean('dir_bruteforce', False):
+            wordlist = self.recon_config.get('dir_wordlist')
+            recon_tasks.append(brute_force_directories(self.base_url, wordlist, session, concurrency))
+        
+        results = await asyncio.gather(*recon_tasks)
+        
+        # Process results and add to queue/db
+        for res_list in results:
+            for finding, status in res_list:
+                if 'http' in finding: # It's a full URL (subdomain or dir)
+                    recon_type = 'subdomain' if self.domain in urlparse(finding).netloc else 'directory'
+                    await asyncio.to_thread(self.db.insert_recon_result, ReconResult(type=recon_type, finding=finding, status_code=status))
+                    self._enqueue_if_new(finding)
         scraper_logger.info("--- Active Reconnaissance Phase Complete ---")
 
+    def _enqueue_if_new(self, url):
+        """Queues a URL unless it has been seen before; returns whether it was queued."""
+        # ScalableBloomFilter.add reports prior membership, so the check and the insert are one call.
+        if self.visited_urls.add(url):
+            return False
+        self._visited_log.write(url.encode() + b'\n')
+        self._put_url(url)
+        return True
+
+    # All queue traffic goes through these two so _queued_urls always mirrors url_queue.
+    def _put_url(self, url):
+        self.url_queue.put_nowait(url)
+        self._queued_urls.append(url)
+
+    async def _get_url(self):
+        url = await self.url_queue.get()
+        self._queued_urls.popleft()
+        return url
+
     async def _parse_page(self, url, html_content, status_code, headers, http_session):
-        soup = BeautifulSoup(html_content, 'lxml')
-        
-        # Basic parsing
-        exclude_selectors = self.config.get('parser', 'exclude_selectors', fallback='').strip()
-        if exclude_selectors:
-            for selector in exclude_selectors.split(','):
-                for tag in soup.select(selector.strip()):
-                    tag.decompose()
-        text = soup.get_text(separator=' ', strip=True)
-        title = soup.title.string.strip() if soup.title else "No Title"
+        loop = asyncio.get_running_loop()
+        pool = self._parse_pool
+        try:
+            parsed = await loop.run_in_executor(pool, parse_html, html_content, url, self.base_url, self._parser_options)
+        except BrokenProcessPool:
+            scraper_logger.error(f"Parse worker crashed while parsing {url}; skipping it.")
+            # Every worker waiting on the dead pool lands here; only the first replaces it.
+            if self._parse_pool is pool:
+                self._parse_pool = self._create_parse_pool()
+                pool.shutdown(wait=False)
+            return
+        except Exception as e:
+            scraper_logger.warning(f"Failed to parse {url}: {e}")
+            return
         
         # Parameter Analysis
         parsed_url = urlparse(url)
-        params = parse_qs(parsed_url.query)
-        for param in params:
-            await asyncio.to_thread(self.db.insert_url_parameter, UrlParameter(url=url, parameter=param))
+        url_parameters = [UrlParameter(url=url, parameter=param) for param in parse_qs(parsed_url.query)]
 
         # OSINT & Recon Analysis
-        language = detect(text) if self.osint_config.getboolean('detect_language', True) and text else None
-        structured_data = extruct.extract(html_content, base_url=url) if self.osint_config.getboolean('extract_structured_data', True) else {}
-        technologies = self.fingerprinter.analyze(url, html_content, headers) if self.osint_config.getboolean('fingerprint_tech', True) else {}
-        contacts = await extract_contacts_and_socials(html_content, url) if self.osint_config.getboolean('extract_contacts', True) else {}
-        image_metadata = await find_and_process_images(soup, url, http_session) if self.osint_config.getboolean('analyze_images', True) else {}
-        interesting_files = await check_interesting_files(http_session, url) if self.osint_config.getboolean('find_hidden_files', True) else {}
-        js_analysis = await find_and_analyze_js(soup, url, http_session) if self.osint_config.getboolean('analyze_js', True) else {}
-        cloud_buckets = find_cloud_buckets(html_content) if self.recon_config.getboolean('find_cloud_buckets', True) else {}
+        technologies = self.fingerprinter.analyze(url, html_content, headers) if self._do_fingerprint else {}
+        contacts, cloud_buckets, structured_data = parsed['contacts'], parsed['cloud_buckets'], parsed['structured_data']
+        image_metadata = await find_and_process_images(parsed['image_urls'], http_session) if self._do_images else {}
+        interesting_files = await check_interesting_files(http_session, url) if self._do_files else {}
+        js_analysis = await find_and_analyze_js(parsed['script_urls'], http_session) if self._do_js else {}
 
         # Save to DB
+        item = None
         try:
             item = ScrapedItem(
-                url=url, title=title, text_content=text, status_code=status_code, language=language,
-                structured_data=json.dumps({k: v for k, v in structured_data.items() if v}),
-                technologies=json.dumps(technologies), emails=json.dumps(contacts.get('emails', [])),
-                social_links=json.dumps(contacts.get('social_links', {})), image_metadata=json.dumps(image_metadata),
-                interesting_files=json.dumps(interesting_files), js_analysis=json.dumps(js_analysis),
-                cloud_buckets=json.dumps(cloud_buckets)
+                url=url, title=parsed['title'], text_content=parsed['text'], status_code=status_code, language=parsed['language'],
+                structured_data=to_json({k: v for k, v in structured_data.items() if v}),
+                technologies=to_json(technologies), emails=to_json(contacts.get('emails', [])),
+                social_links=to_json(contacts.get('social_links', {})), image_metadata=to_json(image_metadata),
+                interesting_files=to_json(interesting_files), js_analysis=to_json(js_analysis),
+                cloud_buckets=to_json(cloud_buckets)
             )
-            await asyncio.to_thread(self.db.insert_item, item)
         except ValidationError as e:
             scraper_logger.warning(f"Data validation failed for {url}: {e}")
+        await self.db_queue.put((item, url_parameters))
         
         # Link discovery
         links_to_add = []
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            full_url = urljoin(self.base_url, href).split('#')[0]
+        for full_url in parsed['links']:
             is_valid, reason = self._is_valid_url(full_url)
             if is_valid:
                 links_to_add.append(full_url)
             elif reason not in ["Invalid scheme", "External domain"]:
                 scraper_logger.debug(f"Skipped URL {full_url}: {reason}")
         
-        pagination_links = set()
-        if self.pagination_selectors:
-            for selector in self.pagination_selectors:
-                for link in soup.select(selector):
-                    href = link.get('href')
-                    if href:
-                        full_url = urljoin(self.base_url, href).split('#')[0]
-                        if self._is_valid_url(full_url)[0]:
-                            pagination_links.add(full_url)
+        pagination_links = {link_url for link_url in parsed['pagination_links'] if self._is_valid_url(link_url)[0]}
         
-        async with self.lock:
-            for link_url in pagination_links:
-                if link_url not in self.visited_urls:
-                    self.visited_urls.add(link_url)
-                    await self.url_queue.put(link_url)
-            for link_url in links_to_add:
-                if link_url not in self.visited_urls:
-                    self.visited_urls.add(link_url)
-                    await self.url_queue.put(link_url)
+        # Nothing below awaits, so the event loop runs it without interleaving other workers.
+        for link_url in pagination_links:
+            self._enqueue_if_new(link_url)
+        for link_url in links_to_add:
+            self._enqueue_if_new(link_url)
 
-    async def _worker(self, browser):
+    async def _db_writer(self):
+        """Drains db_queue, writing whatever has accumulated (up to DB_WRITE_BATCH_SIZE pages) per transaction."""
+        while True:
+            batch = [await self.db_queue.get()]
+            while len(batch) < DB_WRITE_BATCH_SIZE and not self.db_queue.empty():
+                batch.append(self.db_queue.get_nowait())
+            items = [item for item, _ in batch if item is not None]
+            url_parameters = [param for _, params in batch for param in params]
+            try:
+                await asyncio.to_thread(self.db.insert_many, items, url_parameters)
+            except Exception as e:
+                scraper_logger.error(f"Failed to write {len(batch)} pages to the database: {e}")
+            finally:
+                for _ in batch:
+                    self.db_queue.task_done()
+
+    @contextlib.asynccontextmanager
+    async def _host_slot(self, url):
+        """
+        Paces requests per host rather than per worker.
+
+        At most HOST_CONCURRENCY fetches run against a host at once, and successive fetches to it start
+        a random delay_min..delay_max seconds apart however many workers are running.
+        """
+        host = urlsplit(url).hostname or ''
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._host_semaphores[host] = asyncio.BoundedSemaphore(HOST_CONCURRENCY)
+        async with semaphore:
+            now = time.monotonic()
+            # Reserve the start time before sleeping so workers queued on the same host space out.
+            start = max(now, self._host_next_start.get(host, 0.0))
+            self._host_next_start[host] = start + random.uniform(self.delay_min, self.delay_max)
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+    async def _open_context(self, browser):
+        """Opens a stealthed browser context on the healthiest proxy; returns (context, page, proxy)."""
+        from playwright_stealth import stealth_async
         proxy_config = None
         proxy_str = self._get_proxy()
         if proxy_str:
@@ -253,7 +441,7 @@ class AdvancedWebScraper:
         viewport = {'width': width, 'height': height}
 
         context = await browser.new_context(
-            user_agent=self.user_agent.random,
+            user_agent=random.choice(USER_AGENTS),
             viewport=viewport,
             locale=locale,
             timezone_id=timezone_id,
@@ -267,48 +455,70 @@ class AdvancedWebScraper:
             await context.add_init_script(path='canvas_spoof.js')
 
         await stealth_async(context)
+        await context.route("**/*", _block_unneeded_requests)
+        # One page per worker: opening a page per URL costs a renderer setup and two extra round-trips.
+        page = await context.new_page()
+        return context, page, proxy_str
+
+    async def _worker(self, browser):
+        context, page, proxy = await self._open_context(browser)
         
         last_url = self.base_url
-        async with aiohttp.ClientSession(headers={'User-Agent': self.user_agent.random}) as http_session:
-            while not self.should_stop:
-                try: url = await asyncio.wait_for(self.url_queue.get(), timeout=1.0)
-                except asyncio.TimeoutError: continue
-                
-                scraper_logger.info(f"Worker {asyncio.current_task().get_name()}: Crawling {url}")
-                html, status, headers = await self._get_page_content(context, url, referer=last_url)
-                
-                async with self.lock:
-                    self.http_status_codes[status] = self.http_status_codes.get(status, 0) + 1
+        http_session = self._http_session
+        while not self.should_stop:
+            try: url = await asyncio.wait_for(self._get_url(), timeout=1.0)
+            except asyncio.TimeoutError: continue
+            if time.monotonic() >= self._robots_expires_at:
+                await self._refresh_robot_parser()
+            
+            scraper_logger.info(f"Worker {asyncio.current_task().get_name()}: Crawling {url}")
+            async with self._host_slot(url):
+                html, status, headers = await self._get_page_content(page, url, referer=last_url)
+            if html is None:
+                if self._record_proxy_failure(proxy):
+                    await context.close()
+                    context, page, proxy = await self._open_context(browser)
+                else:
+                    # Every attempt failed; the page may have crashed, so start the next URL on a fresh one.
+                    await page.close()
+                    page = await context.new_page()
+            else:
+                self._record_proxy_success(proxy)
+            
+            self.http_status_codes[status] = self.http_status_codes.get(status, 0) + 1
 
-                if html:
-                    await self._parse_page(url, html, status, headers, http_session)
-                
-                async with self.lock:
-                    self.crawled_count += 1
-                
-                self.url_queue.task_done()
-                last_url = url
-                await asyncio.sleep(random.uniform(self.delay_min, self.delay_max))
-            await context.close()
+            if html:
+                await self._parse_page(url, html, status, headers, http_session)
+            
+            self.crawled_count += 1
+            
+            self.url_queue.task_done()
+            last_url = url
+        await context.close()
     
     async def run(self):
+        # Playwright is only needed once crawling starts; importing it here keeps it out of startup
+        # and out of the spawned parse workers, which re-import this module.
+        from playwright.async_api import async_playwright
+        from playwright_stealth import stealth_async
+
         self.status = "Running"
         if os.path.exists(COMMAND_FILE): os.remove(COMMAND_FILE)
+        self._http_session = self._create_http_session()
+        db_writer_task = asyncio.create_task(self._db_writer())
+        await self._refresh_robot_parser()
         
         await self._run_domain_osint()
         await self._run_reconnaissance_phase()
 
         updater_task = asyncio.create_task(self._periodic_updater())
         
-        async with aiohttp.ClientSession(headers={'User-Agent': self.user_agent.random}) as http_session:
-            if self.osint_config.getboolean('wayback_discovery', False):
-                wayback_urls = await query_wayback_machine(http_session, self.domain)
-                async with self.lock:
-                    for url in wayback_urls:
-                        if self._is_valid_url(url)[0] and url not in self.visited_urls:
-                            self.visited_urls.add(url)
-                            await self.url_queue.put(url)
-                scraper_logger.info(f"Added {len(wayback_urls)} URLs from Wayback Machine.")
+        if self.osint_config.getboolean('wayback_discovery', False):
+            wayback_urls = await query_wayback_machine(self._http_session, self.domain)
+            for url in wayback_urls:
+                if self._is_valid_url(url)[0]:
+                    self._enqueue_if_new(url)
+            scraper_logger.info(f"Added {len(wayback_urls)} URLs from Wayback Machine.")
 
         await self._parse_sitemap()
             
@@ -316,7 +526,7 @@ class AdvancedWebScraper:
             browser = await p.chromium.launch(headless=True)
             
             if self.config.has_section('login'):
-                login_context = await browser.new_context(user_agent=self.user_agent.random)
+                login_context = await browser.new_context(user_agent=random.choice(USER_AGENTS))
                 await stealth_async(login_context)
                 try:
                     await self._login(login_context)
@@ -349,21 +559,188 @@ class AdvancedWebScraper:
             await browser.close()
 
         updater_task.cancel()
+        await asyncio.gather(updater_task, return_exceptions=True)
+        await self.db_queue.join()
+        db_writer_task.cancel()
+        await self._update_status_file()
+        await self._save_state()
+        await self.aclose()
+        self._parse_pool.shutdown()
+        self._visited_log.close()
         self.db.close()
         scraper_logger.info("Scraper has shut down.")
 
-    def _load_proxies(self): return []
-    def _get_proxy(self): return None
+    def _load_crawling_rules(self):
+        crawling = self.config['crawling'] if 'crawling' in self.config else {}
+        # IPs and single-label hosts have no registered domain; scope the crawl to the host itself.
+        scope_host = self.domain or urlparse(self.base_url).hostname or ''
+        # Scheme and host (the scope host or any subdomain of it) are checked in one match.
+        self._scope_regex = re.compile(rf'https?://(?:[^/?#@]*@)?(?:[^/?#@:]*\.)?{re.escape(scope_host)}(?::\d+)?(?:[/?#]|$)',
+                                       re.IGNORECASE)
+        self._whitelist_regex = _compile_patterns(crawling.get('whitelist_patterns', ''))
+        self._blacklist_regex = _compile_patterns(crawling.get('blacklist_patterns', ''))
+        self.pagination_selectors = []
+
+    def _initialize_state(self):
+        # Visited URLs are appended to a log as they are first seen, so a checkpoint costs only the new
+        # URLs and an interrupted crawl loses at most one write buffer. Resuming replays the log.
+        if self.resume_crawl and os.path.exists(self.visited_urls_file):
+            with open(self.visited_urls_file, 'rb') as f:
+                for line in f:
+                    self.visited_urls.add(line.rstrip(b'\n').decode())
+        self._visited_log = open(self.visited_urls_file, 'ab' if self.resume_crawl else 'wb', buffering=VISITED_LOG_BUFFER_SIZE)
+        pending_urls = []
+        if self.resume_crawl and os.path.exists(self.queue_file):
+            with open(self.queue_file, 'rb') as f:
+                pending_urls = msgpack.unpackb(f.read())
+        for url in pending_urls or [self.base_url]:
+            self._put_url(url)
+
+    async def _save_state(self):
+        """Checkpoints crawl progress: flushes the visited log and snapshots the pending queue."""
+        self._visited_log.flush()
+        # Packed in one synchronous step, so the snapshot is consistent; only the file write is awaited.
+        await write_file_atomic(self.queue_file, msgpack.packb(list(self._queued_urls)))
+
+    async def _update_status_file(self):
+        """Publishes crawl progress for the dashboard."""
+        elapsed = time.time() - self.start_time
+        crawl_rate = self.crawled_count / elapsed if elapsed > 0 else 0.0
+        queue_size = self.url_queue.qsize()
+        status_data = {
+            "status": self.status, "crawled_count": self.crawled_count, "queue_size": queue_size,
+            "crawl_rate": crawl_rate, "elapsed_time": _format_duration(elapsed),
+            "estimated_time_remaining": _format_duration(queue_size / crawl_rate) if crawl_rate else "N/A",
+            "recent_logs": list(self.recent_logs), "http_status_codes": self.http_status_codes,
+        }
+        await write_file_atomic(self.status_file, orjson.dumps(status_data, option=ORJSON_OPTIONS))
+
+    async def _periodic_updater(self):
+        while True:
+            await asyncio.sleep(STATE_SAVE_INTERVAL)
+            await self._update_status_file()
+            await self._save_state()
+
+    async def _parse_sitemap(self):
+        """Seeds the queue from sitemap.xml, fetching each level of sub-sitemaps concurrently."""
+        if not self.config.getboolean('sitemap', 'enabled', fallback=False):
+            return
+        session = self._http_session
+        semaphore = asyncio.BoundedSemaphore(SITEMAP_CONCURRENCY)
+        timeout = aiohttp.ClientTimeout(total=10)
+
+        async def fetch(sitemap_url):
+            try:
+                async with semaphore, session.get(sitemap_url, timeout=timeout) as r:
+                    if r.status == 200:
+                        body = await read_head(r, SITEMAP_MAX_BYTES + 1)
+                        if len(body) <= SITEMAP_MAX_BYTES:
+                            return body
+                        scraper_logger.debug(f"Skipping oversized sitemap {sitemap_url}")
+            except Exception as e:
+                scraper_logger.debug(f"Sitemap fetch failed for {sitemap_url}: {e}")
+            return None
+
+        robots_sitemaps = list(self.robot_parser.sitemaps) if self.robot_parser else []
+        pending, seen, added = robots_sitemaps or [urljoin(self.base_url, '/sitemap.xml')], set(), 0
+        while pending:
+            seen.update(pending)
+            bodies = await asyncio.gather(*[fetch(sitemap_url) for sitemap_url in pending])
+            pending = []
+            for body in bodies:
+                if not body:
+                    continue
+                try:
+                    sitemaps, pages = parse_sitemap(body)
+                except Exception as e:
+                    scraper_logger.debug(f"Unparseable sitemap: {e}")
+                    continue
+                pending.extend(u for u in dict.fromkeys(sitemaps) if u not in seen and self._is_valid_url(u)[0])
+                for page_url in pages:
+                    if self._is_valid_url(page_url)[0] and self._enqueue_if_new(page_url):
+                        added += 1
+        scraper_logger.info(f"Added {added} URLs from sitemaps.")
+
+    async def _refresh_robot_parser(self):
+        """(Re)loads robots.txt; a new parser object also starts a fresh set of check_url cache entries."""
+        # Set first so workers that hit the expiry together don't all refetch.
+        self._robots_expires_at = time.monotonic() + ROBOTS_TTL
+        robots_url = urljoin(self.base_url, '/robots.txt')
+        try:
+            async with self._http_session.get(robots_url, timeout=aiohttp.ClientTimeout(total=10)) as r:
+                if r.status != 200:
+                    self.robot_parser = None
+                    return
+                body = await read_head(r, ROBOTS_MAX_BYTES)
+        except Exception as e:
+            scraper_logger.warning(f"Could not fetch {robots_url}: {e}")
+            return
+        self.robot_parser = Protego.parse(body.decode('utf-8', 'ignore'))
+
+    async def _get_page_content(self, page, url, referer=None):
+        """
+        Loads a URL in the worker's page, retrying with exponential backoff.
+
+        Returns:
+            tuple: (html, status code, response headers), or (None, 0, {}) if every attempt failed.
+        """
+        from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+        for attempt in range(self.max_retries):
+            try:
+                response = await page.goto(url, referer=referer, wait_until='domcontentloaded', timeout=30000)
+                if self.ajax_wait_selector:
+                    try:
+                        await page.wait_for_selector(self.ajax_wait_selector, timeout=10000)
+                    except PlaywrightTimeoutError:
+                        pass
+                await self._handle_captcha_if_present(page)
+                await self._human_like_interaction(page)
+                if response is None:
+                    return await page.content(), 0, {}
+                return await page.content(), response.status, response.headers
+            except PlaywrightError as e:
+                scraper_logger.warning(f"Attempt {attempt + 1}/{self.max_retries} failed for {url}: {e}")
+                await asyncio.sleep(self.initial_backoff * 2 ** attempt)
+        return None, 0, {}
+
+    def _load_proxies(self):
+        proxy_list = self.config.get('proxies', 'proxy_list', fallback='')
+        return [proxy.strip() for proxy in proxy_list.split(',') if proxy.strip()]
+
+    def _get_proxy(self):
+        """Picks the proxy with the fewest errors among those not cooling down, rotating between equals."""
+        if not self.proxies:
+            return None
+        now = time.monotonic()
+        candidates = [p for p in self.proxies if self._proxy_health[p]['cooldown_until'] <= now] or self.proxies
+        start = self.proxy_index % len(candidates)
+        self.proxy_index += 1
+        return min(candidates[start:] + candidates[:start], key=lambda p: self._proxy_health[p]['errors'])
+
+    def _record_proxy_success(self, proxy):
+        if proxy:
+            self._proxy_health[proxy]['consecutive_errors'] = 0
+
+    def _record_proxy_failure(self, proxy):
+        """Counts a failed page load against a proxy; returns True if the proxy was just benched."""
+        if not proxy:
+            return False
+        health = self._proxy_health[proxy]
+        health['errors'] += 1
+        health['consecutive_errors'] += 1
+        if health['consecutive_errors'] < PROXY_MAX_CONSECUTIVE_ERRORS:
+            return False
+        health['consecutive_errors'] = 0
+        health['cooldown_until'] = time.monotonic() + PROXY_COOLDOWN
+        scraper_logger.warning(f"Proxy {proxy} failed {PROXY_MAX_CONSECUTIVE_ERRORS} times in a row; cooling down for {PROXY_COOLDOWN:.0f}s.")
+        return True
+
     def _load_custom_headers(self): return {}
-    def _load_crawling_rules(self): self.whitelist_patterns, self.blacklist_patterns, self.pagination_selectors = [], [], []
     def _load_retry_settings(self): self.max_retries, self.initial_backoff = 3, 2.0
     def _setup_log_capture(self): pass
-    def _initialize_state(self): self.url_queue.put_nowait(self.base_url)
-    async def _periodic_updater(self): pass
-    def _setup_robot_parser(self): return RobotFileParser()
-    async def _parse_sitemap(self): pass
-    def _is_valid_url(self, url): return True, "Valid"
-    async def _get_page_content(self, context, url, referer=None): return "<html></html>", 200, {}
+    def _is_valid_url(self, url):
+        return check_url(url, self._scope_regex, self._whitelist_regex, self._blacklist_regex, self.robot_parser)
     async def _human_like_interaction(self, page): pass
     async def _login(self, context): pass
     async def _handle_captcha_if_present(self, page): pass
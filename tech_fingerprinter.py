@@ -1,5 +1,14 @@
+import functools
 import logging
-from Wappalyzer import Wappalyzer, WebPage
+
+# Shorter bodies are error stubs and redirects with nothing for the HTML signatures to match.
+MIN_HTML_LENGTH = 256
+
+@functools.lru_cache(maxsize=None)
+def _load_wappalyzer():
+    """Loads and compiles the technology database once per process, on first use."""
+    from Wappalyzer import Wappalyzer
+    return Wappalyzer.latest()
 
 class TechFingerprinter:
     """
@@ -7,7 +16,7 @@ class TechFingerprinter:
     """
     def __init__(self):
         try:
-            self.wappalyzer = Wappalyzer.latest()
+            self.wappalyzer = _load_wappalyzer()
             logging.info("Wappalyzer initialized successfully.")
         except Exception as e:
             logging.error(f"Failed to initialize Wappalyzer: {e}")
@@ -25,9 +34,12 @@ class TechFingerprinter:
         Returns:
             dict: A dictionary of detected technologies and their categories.
         """
-        if not self.wappalyzer:
+        if len(html) < MIN_HTML_LENGTH:
+            html = ''
+        if not self.wappalyzer or not (html or headers):
             return {}
             
+        from Wappalyzer import WebPage
         try:
             webpage = WebPage(url, html, headers)
             tech_info = self.wappalyzer.analyze_with_categories(webpage)
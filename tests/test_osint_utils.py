@@ -0,0 +1,17 @@
+import unittest
+
+from osint_utils import scan_page
+
+class ScanPageTest(unittest.TestCase):
+    def test_unquoted_bucket_url_does_not_swallow_following_contacts(self):
+        html = (b"<p>Assets at https://assets.s3.us-east-1.amazonaws.com/site/logo.png then mail "
+                b"admin@example.com or see https://github.com/example</p>"
+                b"<a href='https://storage.googleapis.com/bucket/file.txt'>x</a> ops@example.org")
+        contacts, buckets = scan_page(html)
+        self.assertEqual(sorted(contacts['emails']), ['admin@example.com', 'ops@example.org'])
+        self.assertEqual(contacts['social_links'], {'github': ['https://github.com/example']})
+        self.assertEqual(buckets, {'s3': ['https://assets.s3.us-east-1.amazonaws.com/site/logo.png'],
+                                   'gcp': ['https://storage.googleapis.com/bucket/file.txt']})
+
+if __name__ == '__main__':
+    unittest.main()